@@ -0,0 +1,74 @@
+"""add user_id to todo_items
+
+Revision ID: 7f2d8b4c1e90
+Revises: 5e7a0c2d9f41
+Create Date: 2026-10-19 13:02:18.447120
+
+First half of the move to hash-partitioned tables, PostgreSQL only. Adds a
+nullable todo_items.user_id, fills it on insert with a trigger (for app
+versions that don't set it yet) and backfills existing rows in batches.
+
+Deploy order:
+  1. alembic upgrade 7f2d8b4c1e90   (old app code keeps working)
+  2. deploy the app code that sets TodoItem.user_id
+  3. alembic upgrade head           (a3c9e5f2b7d6 swaps in the partitioned
+                                     tables, which require user_id)
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2d8b4c1e90'
+down_revision: Union[str, Sequence[str], None] = '5e7a0c2d9f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 5000
+BATCH_DELAY_SECONDS = 0.05
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todo_items', sa.Column('user_id', sa.Integer(), nullable=True))
+
+    # Old app code inserts items without user_id: take it from the list
+    op.execute("""
+        CREATE FUNCTION todo_items_fill_user_id() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.user_id IS NULL THEN
+                SELECT user_id INTO NEW.user_id FROM todo_lists WHERE id = NEW.list_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER todo_items_fill_user_id BEFORE INSERT ON todo_items
+        FOR EACH ROW EXECUTE FUNCTION todo_items_fill_user_id()
+    """)
+
+    # Backfill in small committed batches so the app keeps running
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM todo_items")).one()
+        if low is not None:
+            for start in range(low, high + 1, BATCH_SIZE):
+                bind.execute(sa.text("""
+                    UPDATE todo_items i SET user_id = l.user_id
+                    FROM todo_lists l
+                    WHERE l.id = i.list_id AND i.user_id IS NULL
+                      AND i.id >= :lo AND i.id < :hi
+                """), {"lo": start, "hi": start + BATCH_SIZE})
+                time.sleep(BATCH_DELAY_SECONDS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER todo_items_fill_user_id ON todo_items")
+    op.execute("DROP FUNCTION todo_items_fill_user_id()")
+    op.drop_column('todo_items', 'user_id')
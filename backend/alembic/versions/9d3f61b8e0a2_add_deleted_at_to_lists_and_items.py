@@ -0,0 +1,38 @@
+"""add deleted_at to todo_lists and todo_items
+
+Revision ID: 9d3f61b8e0a2
+Revises: c4e2a9f7d1b3
+Create Date: 2026-10-19 11:03:27.904516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f61b8e0a2'
+down_revision: Union[str, Sequence[str], None] = 'c4e2a9f7d1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todo_lists', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.add_column('todo_items', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Partial indexes: only tombstones are indexed, for the purge worker
+    op.create_index('ix_todo_lists_deleted_at', 'todo_lists', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.create_index('ix_todo_items_deleted_at', 'todo_items', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Tombstoned rows would reappear without the column, remove them first
+    op.execute('DELETE FROM todo_items WHERE deleted_at IS NOT NULL OR list_id IN (SELECT id FROM todo_lists WHERE deleted_at IS NOT NULL)')
+    op.execute('DELETE FROM todo_lists WHERE deleted_at IS NOT NULL')
+    op.drop_index('ix_todo_items_deleted_at', table_name='todo_items')
+    op.drop_index('ix_todo_lists_deleted_at', table_name='todo_lists')
+    op.drop_column('todo_items', 'deleted_at')
+    op.drop_column('todo_lists', 'deleted_at')
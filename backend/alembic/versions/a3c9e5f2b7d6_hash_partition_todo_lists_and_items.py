@@ -0,0 +1,239 @@
+"""hash partition todo_lists and todo_items by user_id
+
+Revision ID: a3c9e5f2b7d6
+Revises: 7f2d8b4c1e90
+Create Date: 2026-10-19 13:26:51.640392
+
+Online move, PostgreSQL only:
+  1. create partitioned copies (todo_lists_new / todo_items_new) with
+     (id, user_id) primary keys
+  2. triggers mirror every write on the old tables into the copies
+  3. copy existing rows in small committed batches (the app keeps running)
+  4. swap the tables in one short transaction
+
+After the swap todo_items.user_id is NOT NULL and can't be filled in by a
+trigger (it is the partition key), so only app code that sets it may run:
+deploy that code after 7f2d8b4c1e90 and before this revision.
+
+Hard deletes that race the copy could be resurrected, so keep the purge
+worker (app/purge.py) stopped while this runs. Soft deletes are plain
+UPDATEs and are safe.
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5f2b7d6'
+down_revision: Union[str, Sequence[str], None] = '7f2d8b4c1e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS = 16
+BATCH_SIZE = 5000
+BATCH_DELAY_SECONDS = 0.05
+
+
+def _copy_in_batches(table: str, insert_sql: str) -> None:
+    """Run insert_sql for consecutive id ranges, committing each batch"""
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(sa.text(insert_sql), {"lo": start, "hi": start + BATCH_SIZE})
+        time.sleep(BATCH_DELAY_SECONDS)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Partitioned copies, sharing the existing id sequences
+    op.execute("""
+        CREATE TABLE todo_lists_new (
+            id integer NOT NULL DEFAULT nextval('todo_lists_id_seq'),
+            name varchar NOT NULL,
+            created_at timestamp,
+            user_id integer NOT NULL REFERENCES users (id),
+            deleted_at timestamp,
+            PRIMARY KEY (id, user_id)
+        ) PARTITION BY HASH (user_id)
+    """)
+    op.execute("""
+        CREATE TABLE todo_items_new (
+            id integer NOT NULL DEFAULT nextval('todo_items_id_seq'),
+            title varchar NOT NULL,
+            completed boolean,
+            created_at timestamp,
+            list_id integer NOT NULL,
+            position varchar COLLATE "C" NOT NULL,
+            deleted_at timestamp,
+            user_id integer NOT NULL,
+            PRIMARY KEY (id, user_id),
+            FOREIGN KEY (list_id, user_id) REFERENCES todo_lists_new (id, user_id)
+        ) PARTITION BY HASH (user_id)
+    """)
+    for i in range(PARTITIONS):
+        op.execute(f"CREATE TABLE todo_lists_p{i} PARTITION OF todo_lists_new FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})")
+        op.execute(f"CREATE TABLE todo_items_p{i} PARTITION OF todo_items_new FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})")
+
+    # Index names are schema-wide, these get their final names after the swap
+    op.execute("CREATE INDEX ix_todo_lists_new_user_id ON todo_lists_new (user_id)")
+    op.execute("CREATE INDEX ix_todo_lists_new_deleted_at ON todo_lists_new (deleted_at) WHERE deleted_at IS NOT NULL")
+    op.execute("CREATE INDEX ix_todo_items_new_list_id_position ON todo_items_new (list_id, position)")
+    op.execute("CREATE INDEX ix_todo_items_new_deleted_at ON todo_items_new (deleted_at) WHERE deleted_at IS NOT NULL")
+
+    # 2. Mirror writes on the old tables
+    op.execute("""
+        CREATE FUNCTION todo_lists_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_lists_new WHERE id = OLD.id AND user_id = OLD.user_id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO todo_lists_new (id, name, created_at, user_id, deleted_at)
+            VALUES (NEW.id, NEW.name, NEW.created_at, NEW.user_id, NEW.deleted_at)
+            ON CONFLICT (id, user_id) DO UPDATE
+            SET name = EXCLUDED.name, created_at = EXCLUDED.created_at, deleted_at = EXCLUDED.deleted_at;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION todo_items_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_items_new WHERE id = OLD.id AND user_id = OLD.user_id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO todo_items_new (id, title, completed, created_at, list_id, position, deleted_at, user_id)
+            VALUES (NEW.id, NEW.title, NEW.completed, NEW.created_at, NEW.list_id, NEW.position, NEW.deleted_at, NEW.user_id)
+            ON CONFLICT (id, user_id) DO UPDATE
+            SET title = EXCLUDED.title, completed = EXCLUDED.completed, position = EXCLUDED.position,
+                deleted_at = EXCLUDED.deleted_at;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER todo_lists_sync AFTER INSERT OR UPDATE OR DELETE ON todo_lists
+        FOR EACH ROW EXECUTE FUNCTION todo_lists_sync()
+    """)
+
+    # 3. Copy existing rows. Lists go first and the items trigger is only
+    # installed afterwards, so mirrored items always find their list.
+    with op.get_context().autocommit_block():
+        _copy_in_batches("todo_lists", """
+            INSERT INTO todo_lists_new (id, name, created_at, user_id, deleted_at)
+            SELECT id, name, created_at, user_id, deleted_at FROM todo_lists
+            WHERE id >= :lo AND id < :hi
+            ON CONFLICT DO NOTHING
+        """)
+
+        op.execute("""
+            CREATE TRIGGER todo_items_sync AFTER INSERT OR UPDATE OR DELETE ON todo_items
+            FOR EACH ROW EXECUTE FUNCTION todo_items_sync()
+        """)
+
+        _copy_in_batches("todo_items", """
+            INSERT INTO todo_items_new (id, title, completed, created_at, list_id, position, deleted_at, user_id)
+            SELECT id, title, completed, created_at, list_id, position, deleted_at, user_id
+            FROM todo_items
+            WHERE id >= :lo AND id < :hi
+            ON CONFLICT DO NOTHING
+        """)
+
+    # 4. Swap (this migration's remaining statements run in one transaction)
+    op.execute("LOCK TABLE todo_lists, todo_items IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER SEQUENCE todo_lists_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE todo_items_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE todo_items")
+    op.execute("DROP TABLE todo_lists")
+    op.execute("DROP FUNCTION todo_items_sync()")
+    op.execute("DROP FUNCTION todo_lists_sync()")
+    op.execute("DROP FUNCTION todo_items_fill_user_id()")
+
+    op.execute("ALTER TABLE todo_lists_new RENAME TO todo_lists")
+    op.execute("ALTER TABLE todo_items_new RENAME TO todo_items")
+    op.execute("ALTER TABLE todo_lists RENAME CONSTRAINT todo_lists_new_pkey TO todo_lists_pkey")
+    op.execute("ALTER TABLE todo_lists RENAME CONSTRAINT todo_lists_new_user_id_fkey TO todo_lists_user_id_fkey")
+    op.execute("ALTER TABLE todo_items RENAME CONSTRAINT todo_items_new_pkey TO todo_items_pkey")
+    op.execute("ALTER TABLE todo_items RENAME CONSTRAINT todo_items_new_list_id_user_id_fkey TO todo_items_list_id_user_id_fkey")
+    op.execute("ALTER INDEX ix_todo_lists_new_user_id RENAME TO ix_todo_lists_user_id")
+    op.execute("ALTER INDEX ix_todo_lists_new_deleted_at RENAME TO ix_todo_lists_deleted_at")
+    op.execute("ALTER INDEX ix_todo_items_new_list_id_position RENAME TO ix_todo_items_list_id_position")
+    op.execute("ALTER INDEX ix_todo_items_new_deleted_at RENAME TO ix_todo_items_deleted_at")
+    op.execute("ALTER SEQUENCE todo_lists_id_seq OWNED BY todo_lists.id")
+    op.execute("ALTER SEQUENCE todo_items_id_seq OWNED BY todo_items.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Back to plain tables; an offline copy, run during a maintenance window
+    op.execute("ALTER SEQUENCE todo_lists_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE todo_items_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE todo_items RENAME TO todo_items_partitioned")
+    op.execute("ALTER TABLE todo_lists RENAME TO todo_lists_partitioned")
+    op.execute("ALTER TABLE todo_lists_partitioned RENAME CONSTRAINT todo_lists_pkey TO todo_lists_partitioned_pkey")
+    op.execute("ALTER TABLE todo_items_partitioned RENAME CONSTRAINT todo_items_pkey TO todo_items_partitioned_pkey")
+    for name in ("ix_todo_lists_user_id", "ix_todo_lists_deleted_at", "ix_todo_items_list_id_position", "ix_todo_items_deleted_at"):
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE todo_lists (
+            id integer NOT NULL DEFAULT nextval('todo_lists_id_seq') PRIMARY KEY,
+            name varchar NOT NULL,
+            created_at timestamp,
+            user_id integer NOT NULL REFERENCES users (id),
+            deleted_at timestamp
+        )
+    """)
+    op.execute("""
+        CREATE TABLE todo_items (
+            id integer NOT NULL DEFAULT nextval('todo_items_id_seq') PRIMARY KEY,
+            title varchar NOT NULL,
+            completed boolean,
+            created_at timestamp,
+            list_id integer NOT NULL REFERENCES todo_lists (id),
+            position varchar COLLATE "C" NOT NULL,
+            deleted_at timestamp,
+            user_id integer
+        )
+    """)
+    op.execute("""
+        INSERT INTO todo_lists (id, name, created_at, user_id, deleted_at)
+        SELECT id, name, created_at, user_id, deleted_at FROM todo_lists_partitioned
+    """)
+    op.execute("""
+        INSERT INTO todo_items (id, title, completed, created_at, list_id, position, deleted_at, user_id)
+        SELECT id, title, completed, created_at, list_id, position, deleted_at, user_id FROM todo_items_partitioned
+    """)
+    op.execute("DROP TABLE todo_items_partitioned")
+    op.execute("DROP TABLE todo_lists_partitioned")
+
+    # Back to 7f2d8b4c1e90, where inserts may still omit user_id
+    op.execute("""
+        CREATE FUNCTION todo_items_fill_user_id() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.user_id IS NULL THEN
+                SELECT user_id INTO NEW.user_id FROM todo_lists WHERE id = NEW.list_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER todo_items_fill_user_id BEFORE INSERT ON todo_items
+        FOR EACH ROW EXECUTE FUNCTION todo_items_fill_user_id()
+    """)
+
+    op.create_index(op.f('ix_todo_lists_id'), 'todo_lists', ['id'], unique=False)
+    op.create_index(op.f('ix_todo_items_id'), 'todo_items', ['id'], unique=False)
+    op.create_index('ix_todo_lists_deleted_at', 'todo_lists', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.create_index('ix_todo_items_list_id_position', 'todo_items', ['list_id', 'position'], unique=False)
+    op.create_index('ix_todo_items_deleted_at', 'todo_items', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.execute("ALTER SEQUENCE todo_lists_id_seq OWNED BY todo_lists.id")
+    op.execute("ALTER SEQUENCE todo_items_id_seq OWNED BY todo_items.id")
@@ -0,0 +1,45 @@
+"""add position to todo_items
+
+Revision ID: c4e2a9f7d1b3
+Revises: 486f1db8d05d
+Create Date: 2026-10-19 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e2a9f7d1b3'
+down_revision: Union[str, Sequence[str], None] = '486f1db8d05d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todo_items', sa.Column('position', sa.String(collation='C'), nullable=True))
+
+    # Backfill existing rows in id order. "j" heads a 10-digit integer key
+    # (see app/ordering.py); decimal digits are valid base-62 digits
+    op.execute("""
+        UPDATE todo_items
+        SET position = ranked.position
+        FROM (
+            SELECT id,
+                   'j' || lpad(row_number() OVER (PARTITION BY list_id ORDER BY id)::text, 10, '0') AS position
+            FROM todo_items
+        ) AS ranked
+        WHERE todo_items.id = ranked.id
+    """)
+
+    op.alter_column('todo_items', 'position', nullable=False)
+    op.create_index('ix_todo_items_list_id_position', 'todo_items', ['list_id', 'position'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todo_items_list_id_position', table_name='todo_items')
+    op.drop_column('todo_items', 'position')
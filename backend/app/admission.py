@@ -0,0 +1,229 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from app.auth import decode_access_token
+
+
+# Concurrency budgets per request class. The read + write + auth defaults add
+# up to SQLAlchemy's default pool size (5 + 10 overflow) so admitted requests
+# never have to wait for a connection.
+AUTH_LIMIT = int(os.getenv("ADMISSION_AUTH_LIMIT", "3"))
+READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", "8"))
+WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", "4"))
+
+# Bounded wait queue per class and the longest a request may wait in it
+QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "2.0"))
+
+# Max requests (running + queued) a single client may have at once
+PER_CLIENT_LIMIT = int(os.getenv("ADMISSION_PER_CLIENT_LIMIT", "4"))
+
+# Behind a reverse proxy every client shares the proxy's address; set this to
+# key anonymous requests on the address the proxy appends to X-Forwarded-For
+TRUST_FORWARDED_FOR = os.getenv("ADMISSION_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+# Password checks (bcrypt, ~330 ms each) get the "auth" budget to themselves;
+# token refresh and logout are cheap HMAC lookups and count as writes
+AUTH_PATHS = {"/auth/login", "/auth/register"}
+
+# Never admission-controlled (/metrics must answer during overload; it is
+# token-gated and rejects other callers before touching any shared state)
+EXEMPT_PATHS = {"/metrics", "/docs", "/redoc", "/openapi.json"}
+
+
+class Budget:
+    """A concurrency limit with a bounded FIFO wait queue"""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiters = deque()
+        # Moving average of how long an admitted request holds its slot
+        self.avg_service_time = 0.05
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.timed_out = 0
+
+    def estimated_wait(self) -> float:
+        """Rough time until a newly queued request would get a slot"""
+        return (len(self.waiters) + 1) / self.limit * self.avg_service_time
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """Wait for a slot; returns None when admitted or the rejection reason"""
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+
+        if len(self.waiters) >= self.queue_size:
+            self.rejected_queue_full += 1
+            return "queue_full"
+
+        # Don't queue a request that would blow its deadline anyway
+        if self.estimated_wait() > timeout:
+            self.rejected_deadline += 1
+            return "deadline"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                try:
+                    self.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            return "timeout"
+
+        self.admitted += 1
+        return None
+
+    def release(self, service_time: Optional[float] = None):
+        if service_time is not None:
+            self.avg_service_time = 0.9 * self.avg_service_time + 0.1 * service_time
+
+        # Hand the slot straight to the next waiter, if any
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "avg_service_ms": round(self.avg_service_time * 1000, 2),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Separate budgets for auth, read and write endpoints plus per-client caps"""
+
+    def __init__(self):
+        self.budgets = {
+            "auth": Budget("auth", AUTH_LIMIT, QUEUE_SIZE),
+            "read": Budget("read", READ_LIMIT, QUEUE_SIZE),
+            "write": Budget("write", WRITE_LIMIT, QUEUE_SIZE),
+        }
+        self.per_client_limit = PER_CLIENT_LIMIT
+        self.max_wait = MAX_WAIT_SECONDS
+        self.clients: Dict[str, int] = {}
+        self.rejected_client_limit = 0
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        if method == "OPTIONS" or path in EXEMPT_PATHS:
+            return None
+        if path in AUTH_PATHS:
+            return "auth"
+        if method in ("GET", "HEAD"):
+            return "read"
+        return "write"
+
+    def stats(self) -> Dict:
+        return {
+            **{name: budget.stats() for name, budget in self.budgets.items()},
+            "clients": len(self.clients),
+            "rejected_client_limit": self.rejected_client_limit,
+        }
+
+
+admission_control = AdmissionController()
+
+
+def client_key(scope) -> str:
+    """Identify the caller by user id from a valid token, else by client address"""
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = decode_access_token(token)
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+
+    if TRUST_FORWARDED_FOR and b"x-forwarded-for" in headers:
+        # The last entry was added by our proxy; earlier ones are client-supplied
+        forwarded = headers[b"x-forwarded-for"].decode("latin-1").split(",")[-1].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """Reject with 503/429 + Retry-After instead of letting requests pile up"""
+
+    def __init__(self, app, controller: AdmissionController = admission_control):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        request_class = controller.classify(scope["method"], scope["path"])
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        if controller.clients.get(key, 0) >= controller.per_client_limit:
+            controller.rejected_client_limit += 1
+            response = JSONResponse(
+                {"detail": "Too many concurrent requests"},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        budget = controller.budgets[request_class]
+        controller.clients[key] = controller.clients.get(key, 0) + 1
+        try:
+            rejection = await budget.acquire(controller.max_wait)
+            if rejection is not None:
+                retry_after = max(1, math.ceil(budget.estimated_wait()))
+                response = JSONResponse(
+                    {"detail": "Server busy, please retry"},
+                    status_code=503,
+                    headers={"Retry-After": str(retry_after)},
+                )
+                await response(scope, receive, send)
+                return
+
+            started = time.monotonic()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                budget.release(time.monotonic() - started)
+        finally:
+            remaining = controller.clients[key] - 1
+            if remaining:
+                controller.clients[key] = remaining
+            else:
+                del controller.clients[key]
@@ -1,15 +1,19 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import os
+import hmac
+import hashlib
+import secrets
+import uuid
 from dotenv import load_dotenv
 
 from app.database import get_db
-from app.models import User
+from app.models import User, RefreshToken
 
 load_dotenv()
 
@@ -17,12 +21,19 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# A just-rotated refresh token is still honoured this long, so several tabs
+# refreshing with the same token don't trip reuse detection
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE_SECONDS", "30"))
+# Bearer token for GET /metrics; the endpoint is disabled (404) while unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Bearer token
 security = HTTPBearer()
+metrics_security = HTTPBearer(auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -52,11 +63,82 @@ def decode_access_token(token: str):
         return None
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Extract user from JWT token"""
+# ============ Refresh Tokens ============
+# Refresh tokens are random, so a keyed HMAC is enough to store them safely;
+# renewing an access token never touches bcrypt.
+
+def hash_refresh_token(token: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def create_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Issue a new refresh token (caller commits)"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+def revoke_token_family(db: Session, family_id: str):
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[int, str]:
+    """Swap a refresh token for a new one; returns (user_id, new token)"""
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    ).with_for_update().first()
+    
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    now = datetime.utcnow()
+    if stored is None or stored.expires_at <= now or stored.revoked_at is not None:
+        raise invalid
+    
+    if stored.rotated_at is not None:
+        grace = timedelta(seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+        if now - stored.rotated_at > grace:
+            # A rotated token was used again: assume it leaked, end the whole session
+            revoke_token_family(db, stored.family_id)
+            db.commit()
+            raise invalid
+        # Another tab beat us to it: hand out a sibling successor
+    else:
+        stored.rotated_at = now
+    
+    new_token = create_refresh_token(db, stored.user_id, stored.family_id)
+    db.commit()
+    return stored.user_id, new_token
+
+
+def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security)
+):
+    """Guard for /metrics: a shared token for the scraper, not a user login"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials, METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> int:
+    """Extract user id from JWT token (no database access)"""
     token = credentials.credentials
     
     payload = decode_access_token(token)
@@ -74,6 +156,14 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
+    return int(user_id)
+
+
+def get_current_user(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    """Extract user from JWT token"""
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
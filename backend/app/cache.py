@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from app.invalidation import InvalidationBus, invalidation_bus
+
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_BYTES_PER_USER = int(
+    os.getenv("RESPONSE_CACHE_MAX_BYTES_PER_USER", str(1024 * 1024))
+)
+
+
+class ResponseCache:
+    """LRU cache of serialized JSON bodies, bounded in bytes overall and per user.
+
+    Keys are (user_id, list_id, variant) where list_id is None for the
+    user's "all lists" response. Entries are dropped on invalidation events:
+    a user event drops that user's "all lists" entries, a list event drops
+    the entries for that list.
+    """
+
+    def __init__(
+        self,
+        bus: InvalidationBus,
+        ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        max_bytes_per_user: int = RESPONSE_CACHE_MAX_BYTES_PER_USER,
+    ):
+        self.bus = bus
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_bytes_per_user = max_bytes_per_user
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[bytes, float]]" = OrderedDict()
+        self._user_keys: Dict[int, "OrderedDict[Tuple, None]"] = {}
+        self._user_bytes: Dict[int, int] = {}
+        self._list_keys: Dict[int, set] = {}
+        self._versions: Dict[int, int] = {}
+        self._epoch = 0
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        bus.subscribe(self.on_invalidation)
+
+    @staticmethod
+    def key(user_id: int, list_id: Optional[int], variant: Hashable = None) -> Tuple:
+        return (user_id, list_id, variant)
+
+    def version(self, user_id: int) -> Tuple[int, int]:
+        """Capture before reading the database; pass to put() to avoid caching stale data"""
+        with self._lock:
+            return (self._epoch, self._versions.get(user_id, 0))
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self.bus.is_fresh():
+                self.misses += 1
+                return None
+
+            body, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._user_keys[key[0]].move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple, body: bytes, version: Tuple[int, int]):
+        user_id, list_id, _ = key
+        size = len(body)
+        if size > self.max_bytes_per_user or size > self.max_bytes:
+            return
+
+        with self._lock:
+            # Something was invalidated while this body was being built
+            if version != (self._epoch, self._versions.get(user_id, 0)):
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (body, time.monotonic() + self.ttl)
+            self._user_keys.setdefault(user_id, OrderedDict())[key] = None
+            self._user_bytes[user_id] = self._user_bytes.get(user_id, 0) + size
+            if list_id is not None:
+                self._list_keys.setdefault(list_id, set()).add(key)
+            self.bytes += size
+
+            while self._user_bytes[user_id] > self.max_bytes_per_user:
+                self._remove(next(iter(self._user_keys[user_id])))
+                self.evictions += 1
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def on_invalidation(self, event: Dict):
+        with self._lock:
+            if event.get("all"):
+                self._entries.clear()
+                self._user_keys.clear()
+                self._user_bytes.clear()
+                self._list_keys.clear()
+                self._versions.clear()
+                self._epoch += 1
+                self.bytes = 0
+                self.invalidations += 1
+                return
+
+            user_id = event.get("user_id")
+            list_id = event.get("list_id")
+
+            if user_id is not None:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                for key in [k for k in self._user_keys.get(user_id, ()) if k[1] is None]:
+                    self._remove(key)
+                    self.invalidations += 1
+
+            if list_id is not None:
+                for key in list(self._list_keys.get(list_id, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def _remove(self, key: Tuple):
+        body, _ = self._entries.pop(key)
+        user_id, list_id, _ = key
+        size = len(body)
+        self.bytes -= size
+
+        user_keys = self._user_keys[user_id]
+        del user_keys[key]
+        self._user_bytes[user_id] -= size
+        if not user_keys:
+            del self._user_keys[user_id]
+            del self._user_bytes[user_id]
+
+        if list_id is not None:
+            list_keys = self._list_keys[list_id]
+            list_keys.discard(key)
+            if not list_keys:
+                del self._list_keys[list_id]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache(invalidation_bus)
@@ -0,0 +1,110 @@
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, fall back to gzip only
+    brotli = None
+
+
+# Responses smaller than this are sent as-is (compression overhead isn't worth it)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+def choose_encoding(accept_encoding: str):
+    """Pick the best encoding the client accepts ('br', 'gzip' or None)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli compression for JSON responses above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if status < 200 or status in (204, 304):
+                    # No body, and these must not carry a Content-Length
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            response_headers = [
+                (k, v) for k, v in start_message.get("headers", [])
+                if k.lower() != b"content-length"
+            ]
+            content_type = next(
+                (v for k, v in response_headers if k.lower() == b"content-type"), b""
+            )
+            already_encoded = any(k.lower() == b"content-encoding" for k, _ in response_headers)
+
+            if (
+                len(body) >= self.minimum_size
+                and content_type.startswith(b"application/json")
+                and not already_encoded
+            ):
+                body = compress(body, encoding)
+                response_headers.append((b"content-encoding", encoding.encode()))
+                response_headers.append((b"vary", b"Accept-Encoding"))
+
+            response_headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,121 @@
+import json
+from typing import Dict, List, Optional, Set
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Query, load_only, selectinload
+
+from app.models import TodoList, TodoItem
+from app.schemas import TodoListWithItems
+
+
+# Fields a client may ask for with ?fields=...
+# List fields are plain names, item fields are prefixed with "items."
+LIST_FIELDS = ("id", "name", "user_id", "created_at")
+ITEM_FIELDS = ("id", "title", "completed", "list_id", "position", "created_at")
+
+
+class FieldSet:
+    """Parsed ?fields= selection for TodoList / TodoItem responses"""
+
+    def __init__(self, list_fields: List[str], item_fields: Optional[List[str]]):
+        self.list_fields = list_fields
+        # None means "items" was not requested at all
+        self.item_fields = item_fields
+
+    @property
+    def key(self) -> str:
+        items = ",".join(self.item_fields) if self.item_fields is not None else "-"
+        return ",".join(self.list_fields) + "|" + items
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FieldSet]:
+    """Parse 'id,name,items.title' into a FieldSet (None = all fields)"""
+    if not fields:
+        return None
+
+    list_fields: List[str] = []
+    item_fields: Optional[List[str]] = None
+    seen: Set[str] = set()
+
+    for raw in fields.split(","):
+        name = raw.strip()
+        if not name or name in seen:
+            continue
+        seen.add(name)
+
+        if name == "items":
+            item_fields = list(ITEM_FIELDS)
+        elif name.startswith("items."):
+            field = name[len("items."):]
+            if field not in ITEM_FIELDS:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+            if item_fields is None:
+                item_fields = []
+            if field not in item_fields:
+                item_fields.append(field)
+        elif name in LIST_FIELDS:
+            list_fields.append(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+
+    return FieldSet(list_fields, item_fields)
+
+
+def apply_fields(query: Query, fieldset: Optional[FieldSet], user_id: int) -> Query:
+    """Restrict the SELECT column list to the requested fields"""
+    # Soft-deleted items are never loaded; user_id keeps the item load on one partition
+    live_items = TodoList.items.and_(
+        TodoItem.user_id == user_id,
+        TodoItem.deleted_at.is_(None)
+    )
+    if fieldset is None:
+        return query.options(selectinload(live_items))
+
+    # id and user_id are always needed for filtering and relationship loading
+    list_columns = {"id", "user_id", *fieldset.list_fields}
+    query = query.options(
+        load_only(*[getattr(TodoList, name) for name in LIST_FIELDS if name in list_columns])
+    )
+
+    if fieldset.item_fields is not None:
+        item_columns = {"id", "list_id", *fieldset.item_fields}
+        query = query.options(
+            selectinload(live_items).load_only(
+                *[getattr(TodoItem, name) for name in ITEM_FIELDS if name in item_columns]
+            )
+        )
+    return query
+
+
+def serialize_list(todo_list: TodoList, fieldset: FieldSet) -> Dict:
+    """Build the trimmed JSON-ready dict for a single list"""
+    data = {name: getattr(todo_list, name) for name in fieldset.list_fields}
+    if fieldset.item_fields is not None:
+        data["items"] = [
+            {name: getattr(item, name) for name in fieldset.item_fields}
+            for item in todo_list.items
+        ]
+    return jsonable_encoder(data)
+
+
+_lists_adapter = TypeAdapter(List[TodoListWithItems])
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def render_lists(todo_lists: List[TodoList], fieldset: Optional[FieldSet]) -> bytes:
+    """Serialize lists straight to JSON bytes (cacheable as-is)"""
+    if fieldset is None:
+        return _lists_adapter.dump_json(
+            _lists_adapter.validate_python(todo_lists, from_attributes=True)
+        )
+    return _dumps([serialize_list(todo_list, fieldset) for todo_list in todo_lists])
+
+
+def render_list(todo_list: TodoList, fieldset: Optional[FieldSet]) -> bytes:
+    if fieldset is None:
+        return TodoListWithItems.model_validate(todo_list).model_dump_json().encode()
+    return _dumps(serialize_list(todo_list, fieldset))
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.database import engine
+
+
+logger = logging.getLogger(__name__)
+
+# Postgres LISTEN/NOTIFY channel shared by all workers
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+
+# Upper bound on how stale a cache may be. If the listener hasn't heard from
+# the database within this window, caches must stop serving cached entries.
+STALENESS_SECONDS = float(os.getenv("INVALIDATION_STALENESS_SECONDS", "5"))
+
+# How often the listener wakes up to prove it is still connected
+HEARTBEAT_SECONDS = min(1.0, STALENESS_SECONDS / 2)
+
+
+class MemoryTransport:
+    """In-process transport; several buses sharing one instance act like workers (tests)"""
+
+    def __init__(self):
+        self.buses: List["InvalidationBus"] = []
+
+    def start(self, bus: "InvalidationBus"):
+        self.buses.append(bus)
+
+    def stop(self, bus: "InvalidationBus"):
+        if bus in self.buses:
+            self.buses.remove(bus)
+
+    def stage(self, db: Session, payload: Dict):
+        pass
+
+    def committed(self, payload: Dict):
+        for bus in list(self.buses):
+            bus.receive(payload)
+
+
+class PostgresTransport:
+    """LISTEN/NOTIFY transport; the NOTIFY is sent inside the writer's transaction"""
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL):
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # The listener holds its connection for good, so it gets its own
+        # unpooled one instead of taking a slot from the request pool.
+        # TCP keepalives make a dead peer fail the heartbeat query quickly.
+        self._engine = create_engine(
+            engine.url,
+            poolclass=NullPool,
+            connect_args={
+                "keepalives": 1,
+                "keepalives_idle": 5,
+                "keepalives_interval": 2,
+                "keepalives_count": 2,
+            },
+        )
+
+    def start(self, bus: "InvalidationBus"):
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._listen, args=(bus,), name="invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, bus: "InvalidationBus"):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=HEARTBEAT_SECONDS * 2)
+
+    def stage(self, db: Session, payload: Dict):
+        # Postgres delivers the notification only if (and when) the transaction commits
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self.channel, "payload": json.dumps(payload)},
+        )
+
+    def committed(self, payload: Dict):
+        pass
+
+    def _listen(self, bus: "InvalidationBus"):
+        backoff = HEARTBEAT_SECONDS
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = self._engine.raw_connection()
+                pg_conn = conn.driver_connection
+                pg_conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+                # Anything published while we were not listening is lost
+                bus.flush_all()
+                bus.heartbeat()
+                backoff = HEARTBEAT_SECONDS
+
+                while not self._stopping.is_set():
+                    select.select([pg_conn], [], [], HEARTBEAT_SECONDS)
+                    # A select() timeout proves nothing on a half-open
+                    # connection; only a completed round trip does. It also
+                    # picks up any notifications that arrived meanwhile.
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                    pg_conn.poll()
+                    while pg_conn.notifies:
+                        notify = pg_conn.notifies.pop(0)
+                        bus.receive(json.loads(notify.payload))
+                    bus.heartbeat()
+            except Exception:
+                bus.disconnected()
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+class InvalidationBus:
+    """Fan out cache invalidations keyed by user id, list id and item id to every worker"""
+
+    def __init__(self, transport=None):
+        self.transport = transport
+        self.origin = uuid.uuid4().hex
+        self.subscribers: List[Callable[[Dict], None]] = []
+        self.last_heartbeat = 0.0
+        self.connected = False
+
+        self.published = 0
+        self.received = 0
+        self.flushes = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Register a cache; callback gets the event dict, {"all": True} means flush"""
+        self.subscribers.append(callback)
+
+    def start(self):
+        if self.transport is not None:
+            self.transport.start(self)
+        self.heartbeat()
+
+    def stop(self):
+        if self.transport is not None:
+            self.transport.stop(self)
+        self.connected = False
+
+    def publish(
+        self,
+        db: Session,
+        user_id: Optional[int] = None,
+        list_id: Optional[int] = None,
+        item_id: Optional[int] = None,
+    ):
+        """Call before db.commit(); nothing is invalidated if the transaction rolls back"""
+        payload = {
+            "origin": self.origin,
+            "ts": time.time(),
+            "user_id": user_id,
+            "list_id": list_id,
+            "item_id": item_id,
+        }
+        if self.transport is not None:
+            self.transport.stage(db, payload)
+
+        # Tie the event to this transaction: if it rolls back, the session's
+        # next commit belongs to another transaction and must not publish it
+        transaction = db.get_transaction() or db.begin()
+
+        def after_commit(session):
+            if session.get_transaction() is not transaction:
+                return
+            self.published += 1
+            self._dispatch(payload)
+            if self.transport is not None:
+                self.transport.committed(payload)
+
+        event.listen(db, "after_commit", after_commit, once=True)
+
+    def receive(self, payload: Dict):
+        """Called by the transport for every event, including our own"""
+        if payload.get("origin") == self.origin:
+            return
+        lag = max(0.0, time.time() - payload.get("ts", time.time()))
+        self.received += 1
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_total += lag
+        self._dispatch(payload)
+
+    def heartbeat(self):
+        self.last_heartbeat = time.monotonic()
+        self.connected = True
+
+    def disconnected(self):
+        if self.connected:
+            self.flush_all()
+        self.connected = False
+
+    def flush_all(self):
+        self.flushes += 1
+        self._dispatch({"all": True})
+
+    def is_fresh(self) -> bool:
+        """True while cached data is guaranteed to be at most STALENESS_SECONDS old"""
+        if self.transport is None:
+            # Other workers' writes would go unnoticed: never serve from cache
+            return False
+        if isinstance(self.transport, MemoryTransport):
+            return True
+        return self.connected and time.monotonic() - self.last_heartbeat < STALENESS_SECONDS
+
+    def _dispatch(self, payload: Dict):
+        for callback in self.subscribers:
+            callback(payload)
+
+    def stats(self) -> Dict:
+        return {
+            "transport": type(self.transport).__name__ if self.transport else None,
+            "connected": self.connected,
+            "fresh": self.is_fresh(),
+            "published": self.published,
+            "received": self.received,
+            "flushes": self.flushes,
+            "lag_last_ms": round(self.lag_last * 1000, 2),
+            "lag_max_ms": round(self.lag_max * 1000, 2),
+            "lag_avg_ms": round(self.lag_total / self.received * 1000, 2) if self.received else 0.0,
+        }
+
+
+def default_transport():
+    """Transport from INVALIDATION_TRANSPORT (postgres, memory or none)
+
+    Only Postgres can fan out between workers. The in-process memory
+    transport is opt-in since it is only correct for a single process;
+    without a transport the response cache is bypassed.
+    """
+    name = os.getenv("INVALIDATION_TRANSPORT") or None
+    if name is None:
+        if engine.dialect.name == "postgresql":
+            return PostgresTransport()
+        logger.warning(
+            "No cache invalidation transport for %s, the response cache is disabled; "
+            "set INVALIDATION_TRANSPORT=memory if the app runs as a single process",
+            engine.dialect.name,
+        )
+        return None
+    if name == "postgres":
+        return PostgresTransport()
+    if name == "memory":
+        return MemoryTransport()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown INVALIDATION_TRANSPORT: {name}")
+
+
+invalidation_bus = InvalidationBus(default_transport())
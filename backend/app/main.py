@@ -1,21 +1,42 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
+from typing import List, Optional
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from app.database import get_db
-from app.models import User, TodoList, TodoItem
+from app.models import User, TodoList, TodoItem, RefreshToken
 from app.schemas import (
-    UserRegister, UserLogin, Token, UserResponse, UserWithLists,
+    UserRegister, UserLogin, Token, RefreshRequest, UserResponse, UserWithLists,
     TodoListCreate, TodoListResponse, TodoListWithItems,
-    TodoItemCreate, TodoItemUpdate, TodoItemResponse
+    TodoItemCreate, TodoItemUpdate, TodoItemMove, TodoItemResponse
 )
 from app.auth import (
     get_password_hash, verify_password, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    get_current_user, get_current_user_id, ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_refresh_token, rotate_refresh_token, revoke_token_family, hash_refresh_token,
+    require_metrics_token
 )
+from app.admission import AdmissionMiddleware, admission_control
+from app.cache import response_cache
+from app.compression import CompressionMiddleware
+from app.fieldsets import parse_fields, apply_fields, render_lists, render_list
+from app.invalidation import invalidation_bus
+from app.ordering import key_between, rebalance_list, POSITION_REBALANCE_LENGTH
+from app.purge import start_purge_worker, stop_purge_worker
 
-app = FastAPI(title="Todo API with Supabase")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    invalidation_bus.start()
+    start_purge_worker()
+    yield
+    stop_purge_worker()
+    invalidation_bus.stop()
+
+
+app = FastAPI(title="Todo API with Supabase", lifespan=lifespan)
 
 # FIXED: Allow both localhost and 127.0.0.1
 origins = [
@@ -27,6 +48,10 @@ origins = [
     "http://localhost:8080",
 ]
 
+# Admission control in front of the DB pool (added before CORS so that
+# 503/429 rejections still carry CORS headers)
+app.add_middleware(AdmissionMiddleware, controller=admission_control)
+
 # CORS - with explicit configuration
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +62,15 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Compress large JSON responses (the 3-second list poll)
+app.add_middleware(CompressionMiddleware)
+
+# Sparse fieldsets, e.g. ?fields=id,name,items.id,items.title,items.completed
+FIELDS_QUERY = Query(
+    None,
+    description="Comma-separated fields to return, items fields prefixed with 'items.'"
+)
+
 
 # ============ Auth Endpoints ============
 
@@ -78,14 +112,44 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
+    # Create access token ("sub" must be a string in a JWT)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.id},
+        data={"sub": str(db_user.id)},
         expires_delta=access_token_expires
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Refresh token lets the client renew without another bcrypt login
+    refresh_token = create_refresh_token(db, db_user.id)
+    db.commit()
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@app.post("/auth/refresh", response_model=Token)
+def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Get a new access token (and rotated refresh token) without a password"""
+    user_id, refresh_token = rotate_refresh_token(db, request.refresh_token)
+    
+    access_token = create_access_token(
+        data={"sub": str(user_id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@app.post("/auth/logout", status_code=204)
+def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke the refresh token (and every token rotated from the same login)"""
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(request.refresh_token)
+    ).first()
+    
+    if stored:
+        revoke_token_family(db, stored.family_id)
+        db.commit()
+    return None
 
 
 @app.get("/auth/me", response_model=UserResponse)
@@ -105,6 +169,7 @@ def create_todo_list(
     """Create a new todo list for the current user"""
     new_list = TodoList(**todo_list.model_dump(), user_id=current_user.id)
     db.add(new_list)
+    invalidation_bus.publish(db, user_id=current_user.id)
     db.commit()
     db.refresh(new_list)
     return new_list
@@ -112,29 +177,55 @@ def create_todo_list(
 
 @app.get("/lists/", response_model=List[TodoListWithItems])
 def get_my_lists(
-    current_user: User = Depends(get_current_user),
+    fields: Optional[str] = FIELDS_QUERY,
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get all lists for the current user"""
-    return db.query(TodoList).filter(TodoList.user_id == current_user.id).all()
+    """Get all lists for the current user (served from the response cache when possible)"""
+    fieldset = parse_fields(fields)
+    cache_key = response_cache.key(user_id, None, fieldset.key if fieldset else None)
+    body = response_cache.get(cache_key)
+
+    if body is None:
+        version = response_cache.version(user_id)
+        query = db.query(TodoList).filter(
+            TodoList.user_id == user_id,
+            TodoList.deleted_at.is_(None)
+        )
+        body = render_lists(apply_fields(query, fieldset, user_id).all(), fieldset)
+        response_cache.put(cache_key, body, version)
+
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/lists/{list_id}", response_model=TodoListWithItems)
 def get_todo_list(
     list_id: int,
-    current_user: User = Depends(get_current_user),
+    fields: Optional[str] = FIELDS_QUERY,
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """Get a specific todo list (must be owned by current user)"""
-    todo_list = db.query(TodoList).filter(
-        TodoList.id == list_id,
-        TodoList.user_id == current_user.id
-    ).first()
-    
-    if not todo_list:
-        raise HTTPException(status_code=404, detail="List not found")
-    
-    return todo_list
+    fieldset = parse_fields(fields)
+    cache_key = response_cache.key(user_id, list_id, fieldset.key if fieldset else None)
+    body = response_cache.get(cache_key)
+
+    if body is None:
+        version = response_cache.version(user_id)
+        query = db.query(TodoList).filter(
+            TodoList.id == list_id,
+            TodoList.user_id == user_id,
+            TodoList.deleted_at.is_(None)
+        )
+        todo_list = apply_fields(query, fieldset, user_id).first()
+        
+        if not todo_list:
+            raise HTTPException(status_code=404, detail="List not found")
+        
+        body = render_list(todo_list, fieldset)
+        response_cache.put(cache_key, body, version)
+
+    return Response(content=body, media_type="application/json")
 
 
 @app.delete("/lists/{list_id}", status_code=204)
@@ -143,16 +234,20 @@ def delete_todo_list(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a todo list (must be owned by current user)"""
-    todo_list = db.query(TodoList).filter(
+    """Delete a todo list (must be owned by current user)
+
+    Soft delete: a single UPDATE, the list and its items are purged later.
+    """
+    deleted = db.query(TodoList).filter(
         TodoList.id == list_id,
-        TodoList.user_id == current_user.id
-    ).first()
+        TodoList.user_id == current_user.id,
+        TodoList.deleted_at.is_(None)
+    ).update({TodoList.deleted_at: datetime.utcnow()}, synchronize_session=False)
     
-    if not todo_list:
+    if not deleted:
         raise HTTPException(status_code=404, detail="List not found")
     
-    db.delete(todo_list)
+    invalidation_bus.publish(db, user_id=current_user.id, list_id=list_id)
     db.commit()
     return None
 
@@ -163,6 +258,7 @@ def delete_todo_list(
 def create_todo_item(
     list_id: int,
     item: TodoItemCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -170,16 +266,33 @@ def create_todo_item(
     # Verify list belongs to current user
     todo_list = db.query(TodoList).filter(
         TodoList.id == list_id,
-        TodoList.user_id == current_user.id
+        TodoList.user_id == current_user.id,
+        TodoList.deleted_at.is_(None)
     ).first()
     
     if not todo_list:
         raise HTTPException(status_code=404, detail="List not found")
     
-    new_item = TodoItem(**item.model_dump(), list_id=list_id)
+    # Append to the end of the list
+    last_position = db.query(func.max(TodoItem.position)).filter(
+        TodoItem.user_id == current_user.id,
+        TodoItem.list_id == list_id
+    ).scalar()
+    
+    new_item = TodoItem(
+        **item.model_dump(),
+        list_id=list_id,
+        user_id=current_user.id,
+        position=key_between(last_position, None)
+    )
     db.add(new_item)
+    invalidation_bus.publish(db, user_id=current_user.id, list_id=list_id)
     db.commit()
     db.refresh(new_item)
+    
+    if len(new_item.position) > POSITION_REBALANCE_LENGTH:
+        background_tasks.add_task(rebalance_list, list_id, current_user.id)
+    
     return new_item
 
 
@@ -193,7 +306,10 @@ def update_todo_item(
     """Update a todo item (must be in user's list)"""
     item = db.query(TodoItem).join(TodoList).filter(
         TodoItem.id == item_id,
-        TodoList.user_id == current_user.id
+        TodoItem.user_id == current_user.id,
+        TodoItem.deleted_at.is_(None),
+        TodoList.user_id == current_user.id,
+        TodoList.deleted_at.is_(None)
     ).first()
     
     if not item:
@@ -204,26 +320,138 @@ def update_todo_item(
     if item_update.completed is not None:
         item.completed = item_update.completed
     
+    invalidation_bus.publish(db, user_id=current_user.id, list_id=item.list_id, item_id=item.id)
     db.commit()
     db.refresh(item)
     return item
 
 
-@app.delete("/items/{item_id}", status_code=204)
-def delete_todo_item(
+@app.post("/items/{item_id}/move", response_model=TodoItemResponse)
+def move_todo_item(
     item_id: int,
+    move: TodoItemMove,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a todo item (must be in user's list)"""
+    """Move an item between two neighbours (updates only the moved row)"""
+    if move.after_id is None and move.before_id is None:
+        raise HTTPException(status_code=400, detail="Give after_id and/or before_id")
+    if item_id in (move.after_id, move.before_id):
+        raise HTTPException(status_code=400, detail="Item can't be its own neighbour")
+    
     item = db.query(TodoItem).join(TodoList).filter(
         TodoItem.id == item_id,
-        TodoList.user_id == current_user.id
+        TodoItem.user_id == current_user.id,
+        TodoItem.deleted_at.is_(None),
+        TodoList.user_id == current_user.id,
+        TodoList.deleted_at.is_(None)
     ).first()
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    db.delete(item)
+    neighbour_ids = [i for i in (move.after_id, move.before_id) if i is not None]
+    neighbours = {
+        row.id: row.position
+        for row in db.query(TodoItem.id, TodoItem.position).filter(
+            TodoItem.id.in_(neighbour_ids),
+            TodoItem.user_id == current_user.id,
+            TodoItem.list_id == item.list_id,
+            TodoItem.deleted_at.is_(None)
+        )
+    }
+    if len(neighbours) != len(neighbour_ids):
+        raise HTTPException(status_code=404, detail="Neighbour item not found in this list")
+    
+    after = neighbours.get(move.after_id)
+    before = neighbours.get(move.before_id)
+    
+    # Only one neighbour given: the other one is whatever is next to it now
+    if after is None:
+        after = db.query(func.max(TodoItem.position)).filter(
+            TodoItem.user_id == current_user.id,
+            TodoItem.list_id == item.list_id,
+            TodoItem.id != item.id,
+            TodoItem.deleted_at.is_(None),
+            TodoItem.position < before
+        ).scalar()
+    elif before is None:
+        before = db.query(func.min(TodoItem.position)).filter(
+            TodoItem.user_id == current_user.id,
+            TodoItem.list_id == item.list_id,
+            TodoItem.id != item.id,
+            TodoItem.deleted_at.is_(None),
+            TodoItem.position > after
+        ).scalar()
+    
+    if after is not None and before is not None:
+        if after == before:
+            # Neighbours share a key (concurrent inserts), spread the list out first.
+            # Returned rather than raised: an HTTPException drops background tasks.
+            background_tasks.add_task(rebalance_list, item.list_id, current_user.id)
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "List is being reordered, please retry"},
+                headers={"Retry-After": "1"},
+                background=background_tasks
+            )
+        if after > before:
+            raise HTTPException(status_code=400, detail="after_id must come before before_id")
+    
+    item.position = key_between(after, before)
+    
+    invalidation_bus.publish(db, user_id=current_user.id, list_id=item.list_id, item_id=item.id)
     db.commit()
-    return None
\ No newline at end of file
+    db.refresh(item)
+    
+    if len(item.position) > POSITION_REBALANCE_LENGTH:
+        background_tasks.add_task(rebalance_list, item.list_id, current_user.id)
+    
+    return item
+
+
+@app.delete("/items/{item_id}", status_code=204)
+def delete_todo_item(
+    item_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a todo item (must be in user's list)
+
+    Soft delete: a single UPDATE, the row is purged later.
+    """
+    user_lists = select(TodoList.id).where(
+        TodoList.user_id == current_user.id,
+        TodoList.deleted_at.is_(None)
+    )
+    list_id = db.execute(
+        update(TodoItem)
+        .where(
+            TodoItem.id == item_id,
+            TodoItem.user_id == current_user.id,
+            TodoItem.deleted_at.is_(None),
+            TodoItem.list_id.in_(user_lists)
+        )
+        .values(deleted_at=datetime.utcnow())
+        .returning(TodoItem.list_id)
+    ).scalar()
+    
+    if list_id is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    invalidation_bus.publish(db, user_id=current_user.id, list_id=list_id, item_id=item_id)
+    db.commit()
+    return None
+
+
+# ============ Metrics ============
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """Admission control, cache invalidation and response cache counters"""
+    return {
+        "admission": admission_control.stats(),
+        "invalidation": invalidation_bus.stats(),
+        "response_cache": response_cache.stats(),
+    }
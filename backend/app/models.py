@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import (
+    Column, Integer, String, Boolean, ForeignKey, ForeignKeyConstraint,
+    DateTime, Index, Sequence, event, func, select, text
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -16,30 +19,86 @@ class User(Base):
     todo_lists = relationship("TodoList", back_populates="owner", cascade="all, delete-orphan")
 
 
-# TodoList and TodoItem stay the same
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # HMAC of the token, the token itself is never stored
+    token_hash = Column(String, unique=True, nullable=False, index=True)
+    # All tokens issued from one login share a family, revoked together on reuse
+    family_id = Column(String, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    # Set when swapped for a successor; reuse after a short grace window revokes the family
+    rotated_at = Column(DateTime, nullable=True)
+    # Set by logout or reuse detection, never accepted again
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# On Postgres todo_lists and todo_items are hash-partitioned by user_id
+# (migration a3c9e5f2b7d6), so every query should filter on user_id to hit
+# a single partition. The primary keys are (id, user_id), with id still
+# drawn from the tables' original sequences.
 class TodoList(Base):
     __tablename__ = "todo_lists"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, Sequence("todo_lists_id_seq"), primary_key=True)
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    # Soft delete: set instead of deleting, rows are purged later (app/purge.py)
+    deleted_at = Column(DateTime, nullable=True)
     
     owner = relationship("User", back_populates="todo_lists")
-    items = relationship("TodoItem", back_populates="todo_list", cascade="all, delete-orphan")
+    items = relationship(
+        "TodoItem",
+        back_populates="todo_list",
+        cascade="all, delete-orphan",
+        order_by="(TodoItem.position, TodoItem.id)"
+    )
+
+    __table_args__ = (
+        Index("ix_todo_lists_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
 
 class TodoItem(Base):
     __tablename__ = "todo_items"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, Sequence("todo_items_id_seq"), primary_key=True)
     title = Column(String, nullable=False)
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    list_id = Column(Integer, ForeignKey("todo_lists.id"), nullable=False)
+    list_id = Column(Integer, nullable=False)
+    # Owner of the list, copied onto the item as the partition key; part of
+    # the primary key, so identity-based UPDATEs and refreshes carry it too
+    user_id = Column(Integer, primary_key=True)
+    # Fractional sort key (see app/ordering.py); "C" collation keeps byte order on Postgres
+    position = Column(String().with_variant(String(collation="C"), "postgresql"), nullable=False)
+    deleted_at = Column(DateTime, nullable=True)
     
     todo_list = relationship("TodoList", back_populates="items")
 
+    __table_args__ = (
+        ForeignKeyConstraint(["list_id", "user_id"], ["todo_lists.id", "todo_lists.user_id"]),
+        Index("ix_todo_items_list_id_position", "list_id", "position"),
+        Index("ix_todo_items_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
+
+
+@event.listens_for(TodoList, "before_insert")
+@event.listens_for(TodoItem, "before_insert")
+def _sqlite_next_id(mapper, connection, target):
+    """SQLite can't autoincrement part of a composite key; stand in for the sequence"""
+    if target.id is None and connection.dialect.name == "sqlite":
+        table = mapper.local_table
+        # A flush runs every before_insert of a batch before the INSERTs
+        issued = connection.info.setdefault("sqlite_next_id", {})
+        stored = connection.scalar(select(func.coalesce(func.max(table.c.id), 0)))
+        target.id = max(stored, issued.get(table.name, 0)) + 1
+        issued[table.name] = target.id
+
 
 class ToDo(Base):
     __tablename__ = "todos"
@@ -0,0 +1,176 @@
+import os
+from typing import List, Optional
+
+from app.database import SessionLocal
+from app.invalidation import invalidation_bus
+from app.models import TodoItem
+
+
+# Position keys follow the usual fractional-indexing layout: a variable
+# length integer part followed by an optional base-62 fraction. The head
+# character gives the integer length ("a" = 1 digit, "b" = 2, ...; "Z", "Y",
+# ... for negatives), so appending or prepending only grows keys
+# logarithmically, while inserting between two keys extends the fraction.
+# Keys compare correctly byte-wise, hence the "C" collation on Postgres.
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+# Rebalance a list once a write produces a key longer than this
+POSITION_REBALANCE_LENGTH = int(os.getenv("POSITION_REBALANCE_LENGTH", "24"))
+REBALANCE_BATCH_SIZE = int(os.getenv("REBALANCE_BATCH_SIZE", "500"))
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """Shortest fraction strictly between a and b (b=None means the end)"""
+    if b is not None:
+        # Keep any shared prefix, treating a as padded with zeros
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+
+    # Adjacent digits: go one level deeper
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid position key head: {head!r}")
+
+
+def _split(key: str):
+    """Split a key into its integer and fraction parts, validating it"""
+    if not key:
+        raise ValueError("Empty position key")
+    length = _integer_length(key[0])
+    if length > len(key) or key == SMALLEST_INTEGER:
+        raise ValueError(f"Invalid position key: {key!r}")
+    integer, fraction = key[:length], key[length:]
+    if fraction.endswith(DIGITS[0]):
+        raise ValueError(f"Invalid position key: {key!r}")
+    return integer, fraction
+
+
+def _increment(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < BASE:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+
+    # Carried out of every digit: move to the next integer length
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def key_between(a: Optional[str], b: Optional[str]) -> str:
+    """Position key sorting after a and before b (None = open end)"""
+    int_a, frac_a = _split(a) if a is not None else (None, None)
+    int_b, frac_b = _split(b) if b is not None else (None, None)
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"{a!r} is not before {b!r}")
+
+    if a is None:
+        if b is None:
+            return "a" + DIGITS[0]
+        if int_b == SMALLEST_INTEGER:
+            return int_b + _midpoint("", frac_b)
+        if frac_b:
+            return int_b
+        key = _decrement(int_b)
+        if key is None:
+            raise ValueError("Position keys exhausted")
+        return key
+
+    if b is None:
+        key = _increment(int_a)
+        return key if key is not None else int_a + _midpoint(frac_a, None)
+
+    if int_a == int_b:
+        return int_a + _midpoint(frac_a, frac_b)
+    key = _increment(int_a)
+    if key is None:
+        raise ValueError("Position keys exhausted")
+    return key if key < b else int_a + _midpoint(frac_a, None)
+
+
+def evenly_spaced_keys(count: int) -> List[str]:
+    """count ascending keys: consecutive integers, the shortest keys there are"""
+    keys = []
+    key = None
+    for _ in range(count):
+        key = key_between(key, None)
+        keys.append(key)
+    return keys
+
+
+def rebalance_list(list_id: int, user_id: int):
+    """Rewrite all positions in a list with evenly spaced keys (background task)"""
+    db = SessionLocal()
+    try:
+        # Lock the rows so a concurrent move can't be overwritten
+        rows = db.query(TodoItem.id, TodoItem.user_id).filter(
+            TodoItem.user_id == user_id,
+            TodoItem.list_id == list_id,
+            TodoItem.deleted_at.is_(None)
+        ).order_by(TodoItem.position, TodoItem.id).with_for_update().all()
+
+        keys = evenly_spaced_keys(len(rows))
+        # bulk_update_mappings matches on the primary key, (id, user_id)
+        updates = [
+            {"id": row.id, "user_id": row.user_id, "position": key}
+            for row, key in zip(rows, keys)
+        ]
+
+        # Batched statements in one transaction, so readers never see a
+        # half-rebalanced list
+        for start in range(0, len(updates), REBALANCE_BATCH_SIZE):
+            db.bulk_update_mappings(TodoItem, updates[start:start + REBALANCE_BATCH_SIZE])
+
+        invalidation_bus.publish(db, user_id=user_id, list_id=list_id)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,145 @@
+"""Physically remove soft-deleted lists and items, and spent refresh
+tokens, in small batches.
+
+Run once from the backend directory:
+
+    python -m app.purge
+
+or keep it running with --interval, or set PURGE_INTERVAL_SECONDS to run it
+in a background thread inside the API process.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, or_, select
+
+from app.database import SessionLocal
+from app.models import TodoList, TodoItem, RefreshToken
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tombstones younger than this are kept (undo window, replication lag, ...)
+PURGE_RETENTION_HOURS = float(os.getenv("PURGE_RETENTION_HOURS", "24"))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+# Pause between batches so the purge never hogs the database
+PURGE_BATCH_DELAY_SECONDS = float(os.getenv("PURGE_BATCH_DELAY_SECONDS", "0.2"))
+# 0 disables the in-process purge thread
+PURGE_INTERVAL_SECONDS = float(os.getenv("PURGE_INTERVAL_SECONDS", "0"))
+
+
+def purge_batch(db, cutoff: datetime, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete one batch of tombstoned rows older than cutoff; returns rows deleted"""
+    # Items first: deleted items and items of deleted lists
+    dead_lists = select(TodoList.id).where(TodoList.deleted_at < cutoff)
+    item_ids = select(TodoItem.id).where(
+        or_(TodoItem.deleted_at < cutoff, TodoItem.list_id.in_(dead_lists))
+    ).limit(batch_size)
+    deleted = db.execute(
+        delete(TodoItem).where(TodoItem.id.in_(item_ids))
+    ).rowcount
+
+    if not deleted:
+        # Lists go once nothing references them any more
+        list_ids = select(TodoList.id).where(
+            TodoList.deleted_at < cutoff,
+            ~exists().where(TodoItem.list_id == TodoList.id)
+        ).limit(batch_size)
+        deleted = db.execute(
+            delete(TodoList).where(TodoList.id.in_(list_ids))
+        ).rowcount
+
+    if not deleted:
+        # Refresh tokens: expired ones, and revoked or rotated ones past the
+        # retention window (reuse of those is no longer detected, just rejected)
+        token_ids = select(RefreshToken.id).where(
+            or_(
+                RefreshToken.expires_at < datetime.utcnow(),
+                RefreshToken.revoked_at < cutoff,
+                RefreshToken.rotated_at < cutoff
+            )
+        ).limit(batch_size)
+        deleted = db.execute(
+            delete(RefreshToken).where(RefreshToken.id.in_(token_ids))
+        ).rowcount
+
+    db.commit()
+    return deleted
+
+
+def purge(
+    retention_hours: float = PURGE_RETENTION_HOURS,
+    batch_size: int = PURGE_BATCH_SIZE,
+    delay: float = PURGE_BATCH_DELAY_SECONDS,
+) -> int:
+    """Purge everything past the retention window, one throttled batch at a time"""
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            deleted = purge_batch(db, cutoff, batch_size)
+            if not deleted:
+                return total
+            total += deleted
+            time.sleep(delay)
+    finally:
+        db.close()
+
+
+def _run_forever(interval: float, stopping: threading.Event):
+    while not stopping.wait(interval):
+        try:
+            purge()
+        except Exception:
+            logger.exception("Purge failed")
+
+
+_stopping = threading.Event()
+
+
+def start_purge_worker():
+    """Start the in-process purge thread if PURGE_INTERVAL_SECONDS is set
+
+    Every process that imports the app starts its own thread, so with
+    `uvicorn --workers N` there are N purgers. They only repeat each other's
+    DELETEs, but on multi-worker deployments prefer leaving this unset and
+    running `python -m app.purge --interval ...` once instead.
+    """
+    if PURGE_INTERVAL_SECONDS <= 0:
+        return
+    _stopping.clear()
+    threading.Thread(
+        target=_run_forever,
+        args=(PURGE_INTERVAL_SECONDS, _stopping),
+        name="purge-worker",
+        daemon=True,
+    ).start()
+
+
+def stop_purge_worker():
+    _stopping.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge soft-deleted todo lists and items and spent refresh tokens")
+    parser.add_argument("--retention-hours", type=float, default=PURGE_RETENTION_HOURS)
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    parser.add_argument("--delay", type=float, default=PURGE_BATCH_DELAY_SECONDS)
+    parser.add_argument(
+        "--interval", type=float, default=0,
+        help="Keep running, purging every INTERVAL seconds"
+    )
+    args = parser.parse_args()
+
+    while True:
+        purged = purge(args.retention_hours, args.batch_size, args.delay)
+        print(f"Purged {purged} rows")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
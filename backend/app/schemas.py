@@ -18,6 +18,11 @@ class UserRegister(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -68,9 +73,15 @@ class TodoItemUpdate(BaseModel):
     title: Optional[str] = None
     completed: Optional[bool] = None
 
+class TodoItemMove(BaseModel):
+    # Neighbours at the destination; give one or both
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
 class TodoItemResponse(TodoItemBase):
     id: int
     list_id: int
+    position: str
     created_at: datetime
     
     class Config:
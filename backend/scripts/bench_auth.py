@@ -0,0 +1,79 @@
+"""Compare login CPU cost: bcrypt re-login vs refresh-token renewal.
+
+Models the 3-second-poll workload: every user keeps the app open for
+--hours, and the access token expires every ACCESS_TOKEN_EXPIRE_MINUTES.
+Without refresh tokens each expiry is a full bcrypt login; with them it is
+one login plus HMAC/lookup renewals.
+
+    cd backend
+    python scripts/bench_auth.py --users 200 --hours 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Throwaway SQLite database so the benchmark never touches the real one
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import User  # noqa: E402
+from app.auth import (  # noqa: E402
+    ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, create_refresh_token,
+    get_password_hash, rotate_refresh_token, verify_password
+)
+
+
+def cpu_per_op(fn, n: int) -> float:
+    start = time.process_time()
+    for _ in range(n):
+        fn()
+    return (time.process_time() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password=get_password_hash("pw"))
+    db.add(user)
+    db.commit()
+
+    def login():
+        verify_password("pw", user.hashed_password)
+        create_access_token({"sub": str(user.id)})
+
+    token = create_refresh_token(db, user.id)
+    db.commit()
+
+    def renew():
+        nonlocal token
+        _, token = rotate_refresh_token(db, token)
+        create_access_token({"sub": str(user.id)})
+
+    login_cpu = cpu_per_op(login, args.samples)
+    renew_cpu = cpu_per_op(renew, args.samples)
+    db.close()
+
+    sessions = max(1, int(args.hours * 60 // ACCESS_TOKEN_EXPIRE_MINUTES))
+    before = args.users * sessions * login_cpu
+    after = args.users * (login_cpu + (sessions - 1) * renew_cpu)
+
+    print(f"bcrypt login:       {login_cpu * 1000:8.2f} ms CPU")
+    print(f"refresh renewal:    {renew_cpu * 1000:8.2f} ms CPU")
+    print(f"{args.users} users x {args.hours:g}h, {sessions} token lifetimes each")
+    print(f"re-login every expiry: {before:8.2f} s CPU")
+    print(f"refresh tokens:        {after:8.2f} s CPU ({before / after:.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
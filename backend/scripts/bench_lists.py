@@ -0,0 +1,65 @@
+"""Measure bytes on the wire for the 3-second GET /lists/ poll.
+
+Compares the full response against the frontend's sparse fieldset, each
+with and without gzip/brotli (brotli only if installed).
+
+    cd backend
+    python scripts/bench_lists.py --lists 5 --items 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# Throwaway SQLite database so the benchmark never touches the real one
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_lists.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.compression import brotli  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+# Keep in sync with LIST_FIELDS in frontend/index.html
+FRONTEND_FIELDS = "id,name,items.id,items.title,items.completed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lists", type=int, default=5)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    with TestClient(app) as client:
+        client.post("/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "pw"
+        })
+        token = client.post("/auth/login", json={"username": "bench", "password": "pw"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        for i in range(args.lists):
+            todo_list = client.post("/lists/", json={"name": f"List {i}"}, headers=headers).json()
+            for j in range(args.items):
+                client.post(
+                    f"/lists/{todo_list['id']}/items/",
+                    json={"title": f"Buy item number {j} from the shop"},
+                    headers=headers,
+                )
+
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        baseline = None
+        print(f"{args.lists} lists x {args.items} items")
+        for label, url in (("full", "/lists/"), ("sparse", f"/lists/?fields={FRONTEND_FIELDS}")):
+            for encoding in encodings:
+                response = client.get(url, headers={**headers, "Accept-Encoding": encoding})
+                size = int(response.headers["content-length"])
+                baseline = baseline or size
+                print(f"{label:6} {encoding:8} {size:8d} bytes  ({baseline / size:5.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
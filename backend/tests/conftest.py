@@ -0,0 +1,55 @@
+import os
+
+# app.database builds its engine at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("INVALIDATION_TRANSPORT", "memory")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, SessionLocal
+from app.invalidation import invalidation_bus
+from app.main import app
+
+
+@pytest.fixture
+def db_engine():
+    """A fresh in-memory database shared by every thread (request handlers too)"""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    # Ids restart with every database, so cached responses must go too
+    invalidation_bus.flush_all()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db_engine):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def login(client):
+    """login(username) registers the user if needed and returns the token response"""
+    def login(username: str = "alice"):
+        client.post("/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": "secret"
+        })
+        response = client.post("/auth/login", json={"username": username, "password": "secret"})
+        assert response.status_code == 200
+        return response.json()
+    return login
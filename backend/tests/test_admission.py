@@ -0,0 +1,82 @@
+import asyncio
+
+from app.admission import AdmissionController, Budget
+
+
+def test_admits_up_to_limit_then_queues_in_order():
+    async def scenario():
+        budget = Budget("read", limit=1, queue_size=4)
+        assert await budget.acquire(1.0) is None
+
+        order = []
+
+        async def waiter(name):
+            result = await budget.acquire(1.0)
+            order.append(name)
+            return result
+
+        tasks = [asyncio.create_task(waiter(n)) for n in ("first", "second")]
+        await asyncio.sleep(0)
+        assert len(budget.waiters) == 2
+
+        budget.release(0.01)
+        await asyncio.sleep(0)
+        budget.release(0.01)
+        assert await asyncio.gather(*tasks) == [None, None]
+        assert order == ["first", "second"]
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queue_full():
+    async def scenario():
+        budget = Budget("write", limit=1, queue_size=1)
+        assert await budget.acquire(1.0) is None
+        queued = asyncio.create_task(budget.acquire(1.0))
+        await asyncio.sleep(0)
+
+        assert await budget.acquire(1.0) == "queue_full"
+        assert budget.rejected_queue_full == 1
+
+        budget.release()
+        assert await queued is None
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_estimated_wait_exceeds_deadline():
+    async def scenario():
+        budget = Budget("auth", limit=1, queue_size=10)
+        budget.avg_service_time = 5.0
+        assert await budget.acquire(1.0) is None
+
+        assert await budget.acquire(1.0) == "deadline"
+        assert budget.rejected_deadline == 1
+        assert not budget.waiters
+
+    asyncio.run(scenario())
+
+
+def test_times_out_and_leaves_queue():
+    async def scenario():
+        budget = Budget("read", limit=1, queue_size=10)
+        budget.avg_service_time = 0.001
+        assert await budget.acquire(1.0) is None
+
+        assert await budget.acquire(0.01) == "timeout"
+        assert budget.timed_out == 1
+
+        # The timed-out waiter must not swallow the next free slot
+        budget.release()
+        assert await budget.acquire(0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_only_password_checks_use_auth_budget():
+    controller = AdmissionController()
+    assert controller.classify("POST", "/auth/login") == "auth"
+    assert controller.classify("POST", "/auth/register") == "auth"
+    assert controller.classify("POST", "/auth/refresh") == "write"
+    assert controller.classify("POST", "/auth/logout") == "write"
+    assert controller.classify("GET", "/auth/me") == "read"
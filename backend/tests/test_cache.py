@@ -0,0 +1,96 @@
+from app.cache import ResponseCache
+from app.invalidation import InvalidationBus, MemoryTransport
+
+
+def make_cache(**limits):
+    bus = InvalidationBus(MemoryTransport())
+    return bus, ResponseCache(bus, ttl=60, **limits)
+
+
+def put(cache, key, body):
+    cache.put(key, body, cache.version(key[0]))
+
+
+def test_evicts_least_recently_used_per_user():
+    _, cache = make_cache(max_bytes=1000, max_bytes_per_user=10)
+    first, second, third = (ResponseCache.key(1, i) for i in range(3))
+    put(cache, first, b"aaaa")
+    put(cache, second, b"bbbb")
+    assert cache.get(first) == b"aaaa"
+
+    put(cache, third, b"cccc")
+    assert cache.get(second) is None
+    assert cache.get(first) == b"aaaa"
+    assert cache.get(third) == b"cccc"
+    assert cache.evictions == 1
+
+
+def test_evicts_across_users_on_total_limit():
+    _, cache = make_cache(max_bytes=10, max_bytes_per_user=10)
+    put(cache, ResponseCache.key(1, None), b"aaaa")
+    put(cache, ResponseCache.key(2, None), b"bbbb")
+    put(cache, ResponseCache.key(3, None), b"cccc")
+
+    assert cache.get(ResponseCache.key(1, None)) is None
+    assert cache.bytes == 8
+    assert cache.stats()["entries"] == 2
+
+
+def test_oversized_body_is_not_cached():
+    _, cache = make_cache(max_bytes=100, max_bytes_per_user=4)
+    key = ResponseCache.key(1, None)
+    put(cache, key, b"too big")
+    assert cache.get(key) is None
+    assert cache.bytes == 0
+
+
+def test_put_after_invalidation_is_dropped():
+    bus, cache = make_cache()
+    key = ResponseCache.key(1, None)
+    version = cache.version(1)
+    # A write lands while the response is being rendered
+    bus.receive({"user_id": 1, "list_id": None})
+    cache.put(key, b"stale", version)
+    assert cache.get(key) is None
+
+    cache.put(key, b"fresh", cache.version(1))
+    assert cache.get(key) == b"fresh"
+
+
+def test_other_users_writes_do_not_block_put():
+    bus, cache = make_cache()
+    key = ResponseCache.key(1, None)
+    version = cache.version(1)
+    bus.receive({"user_id": 2, "list_id": None})
+    cache.put(key, b"body", version)
+    assert cache.get(key) == b"body"
+
+
+def test_flush_drops_entries_and_pending_puts():
+    bus, cache = make_cache()
+    key = ResponseCache.key(1, 5)
+    put(cache, key, b"body")
+    version = cache.version(1)
+    bus.flush_all()
+
+    assert cache.get(key) is None
+    cache.put(key, b"body", version)
+    assert cache.get(key) is None
+
+
+def test_list_event_drops_only_that_list():
+    bus, cache = make_cache()
+    put(cache, ResponseCache.key(1, 5), b"five")
+    put(cache, ResponseCache.key(1, 6), b"six")
+    bus.receive({"list_id": 5})
+
+    assert cache.get(ResponseCache.key(1, 5)) is None
+    assert cache.get(ResponseCache.key(1, 6)) == b"six"
+
+
+def test_no_transport_bypasses_cache():
+    # Without a transport other workers' writes would go unnoticed
+    cache = ResponseCache(InvalidationBus(None), ttl=60)
+    key = ResponseCache.key(1, None)
+    put(cache, key, b"body")
+    assert cache.get(key) is None
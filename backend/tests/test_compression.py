@@ -0,0 +1,54 @@
+
+import pytest
+
+from app import compression
+from app.compression import choose_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=0.0, identity", None),
+    ("gzip;q=bogus", None),
+    ("*", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_falls_back_to_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") is None
+
+
+def test_large_json_is_compressed(client, login):
+    headers = {"Authorization": f"Bearer {login()['access_token']}"}
+    for i in range(30):
+        client.post("/lists/", json={"name": f"list {i}"}, headers=headers)
+
+    plain = client.get("/lists/", headers={**headers, "Accept-Encoding": "identity"})
+    response = client.get("/lists/", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == plain.json()
+    assert int(response.headers["content-length"]) < len(plain.content)
+
+
+def test_no_content_length_on_204(client, login):
+    headers = {"Authorization": f"Bearer {login()['access_token']}", "Accept-Encoding": "gzip"}
+    todo_list = client.post("/lists/", json={"name": "Home"}, headers=headers).json()
+
+    response = client.delete(f"/lists/{todo_list['id']}", headers=headers)
+    assert response.status_code == 204
+    assert "content-length" not in response.headers
+    assert "content-encoding" not in response.headers
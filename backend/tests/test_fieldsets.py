@@ -0,0 +1,51 @@
+import pytest
+from fastapi import HTTPException
+
+from app.fieldsets import ITEM_FIELDS, parse_fields
+
+
+def test_no_fields_means_everything():
+    assert parse_fields(None) is None
+    assert parse_fields("") is None
+
+
+def test_list_fields_only():
+    fieldset = parse_fields("id, name,id")
+    assert fieldset.list_fields == ["id", "name"]
+    assert fieldset.item_fields is None
+
+
+def test_items_prefix_selects_item_fields():
+    fieldset = parse_fields("name,items.title,items.completed,items.title")
+    assert fieldset.list_fields == ["name"]
+    assert fieldset.item_fields == ["title", "completed"]
+
+
+def test_bare_items_selects_all_item_fields():
+    assert parse_fields("id,items").item_fields == list(ITEM_FIELDS)
+
+
+def test_key_tells_variants_apart():
+    assert parse_fields("id").key != parse_fields("id,items").key
+    assert parse_fields("id,items.id").key != parse_fields("id,items.title").key
+
+
+@pytest.mark.parametrize("fields", ["bogus", "items.bogus", "items.", "hashed_password"])
+def test_unknown_field_rejected(fields):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_fields(fields)
+    assert excinfo.value.status_code == 400
+
+
+def test_sparse_list_response(client, login):
+    headers = {"Authorization": f"Bearer {login()['access_token']}"}
+    todo_list = client.post("/lists/", json={"name": "Home"}, headers=headers).json()
+    item = client.post(f"/lists/{todo_list['id']}/items/", json={"title": "Milk"}, headers=headers).json()
+
+    response = client.get("/lists/?fields=id,name,items.id,items.title,items.completed", headers=headers)
+    assert response.json() == [{
+        "id": todo_list["id"],
+        "name": "Home",
+        "items": [{"id": item["id"], "title": "Milk", "completed": False}],
+    }]
+    assert client.get("/lists/?fields=nope", headers=headers).status_code == 400
@@ -0,0 +1,68 @@
+from app.database import SessionLocal
+from app.invalidation import InvalidationBus, MemoryTransport, default_transport
+
+
+def make_workers(count):
+    transport = MemoryTransport()
+    buses = []
+    for _ in range(count):
+        bus = InvalidationBus(transport)
+        events = []
+        bus.subscribe(events.append)
+        bus.start()
+        buses.append((bus, events))
+    return buses
+
+
+def test_commit_reaches_every_worker_once():
+    (writer, writer_events), (reader, reader_events) = make_workers(2)
+
+    db = SessionLocal()
+    try:
+        writer.publish(db, user_id=1, list_id=2, item_id=3)
+        assert writer_events == [] and reader_events == []
+        db.commit()
+    finally:
+        db.close()
+
+    assert [(e["user_id"], e["list_id"], e["item_id"]) for e in writer_events] == [(1, 2, 3)]
+    assert [(e["user_id"], e["list_id"], e["item_id"]) for e in reader_events] == [(1, 2, 3)]
+    assert writer.published == 1 and writer.received == 0
+    assert reader.received == 1
+
+
+def test_rollback_invalidates_nothing():
+    (writer, writer_events), (reader, reader_events) = make_workers(2)
+
+    db = SessionLocal()
+    try:
+        writer.publish(db, user_id=1)
+        db.rollback()
+        db.commit()
+    finally:
+        db.close()
+
+    assert writer_events == [] and reader_events == []
+
+
+def test_stopped_worker_stops_receiving():
+    (writer, _), (reader, reader_events) = make_workers(2)
+    reader.stop()
+
+    db = SessionLocal()
+    try:
+        writer.publish(db, user_id=1)
+        db.commit()
+    finally:
+        db.close()
+
+    assert reader_events == []
+
+
+def test_memory_transport_is_opt_in(monkeypatch, caplog):
+    monkeypatch.delenv("INVALIDATION_TRANSPORT", raising=False)
+    assert default_transport() is None
+    assert "response cache is disabled" in caplog.text
+
+    monkeypatch.setenv("INVALIDATION_TRANSPORT", "memory")
+    assert isinstance(default_transport(), MemoryTransport)
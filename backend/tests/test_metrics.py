@@ -0,0 +1,20 @@
+from app import auth
+
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_token(client, login, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "scrape-me")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    # A user's access token is not enough either
+    user = {"Authorization": f"Bearer {login()['access_token']}"}
+    assert client.get("/metrics", headers=user).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"admission", "invalidation", "response_cache"}
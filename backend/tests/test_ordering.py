@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from app.ordering import SMALLEST_INTEGER, evenly_spaced_keys, key_between
+
+
+def test_evenly_spaced_keys_ascend():
+    keys = evenly_spaced_keys(5000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert keys[:3] == ["a0", "a1", "a2"]
+
+
+def test_appends_and_prepends_stay_short():
+    key = None
+    for _ in range(10000):
+        key = key_between(key, None)
+    assert len(key) <= 4
+
+    key = "a0"
+    for _ in range(10000):
+        key = key_between(None, key)
+    assert len(key) <= 4
+
+
+def test_between_sorts_strictly_inside():
+    keys = evenly_spaced_keys(3)
+    rng = random.Random(0)
+    for _ in range(2000):
+        i = rng.randrange(len(keys) + 1)
+        a = keys[i - 1] if i > 0 else None
+        b = keys[i] if i < len(keys) else None
+        key = key_between(a, b)
+        assert (a is None or a < key) and (b is None or key < b)
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+
+
+def test_repeated_inserts_at_one_spot():
+    a, b = "a0", "a1"
+    for _ in range(200):
+        key = key_between(a, b)
+        assert a < key < b
+        b = key
+
+
+def test_before_smallest_integer_uses_fraction():
+    key = key_between(None, SMALLEST_INTEGER + "V")
+    assert key < SMALLEST_INTEGER + "V"
+
+
+@pytest.mark.parametrize("a, b", [("a1", "a0"), ("a1", "a1")])
+def test_rejects_unordered_bounds(a, b):
+    with pytest.raises(ValueError):
+        key_between(a, b)
+
+
+@pytest.mark.parametrize("key", ["", "!", "b1", "a10", SMALLEST_INTEGER])
+def test_rejects_invalid_keys(key):
+    with pytest.raises(ValueError):
+        key_between(key, None)
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import TodoItem, TodoList, User
+from app.purge import purge_batch
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="alice", email="alice@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_list(db, user, items=0, deleted_at=None, item_deleted_at=None):
+    todo_list = TodoList(name="Home", user_id=user.id, deleted_at=deleted_at)
+    db.add(todo_list)
+    db.flush()
+    for i in range(items):
+        db.add(TodoItem(
+            title=f"item {i}", list_id=todo_list.id, user_id=user.id,
+            position=f"a{i}", deleted_at=item_deleted_at
+        ))
+    db.commit()
+    return todo_list.id
+
+
+def counts(db):
+    db.expire_all()
+    return db.query(TodoList).count(), db.query(TodoItem).count()
+
+
+def test_items_go_before_their_list(db, user):
+    old = datetime.utcnow() - timedelta(days=2)
+    add_list(db, user, items=3, deleted_at=old)
+    cutoff = datetime.utcnow() - timedelta(days=1)
+
+    assert purge_batch(db, cutoff) == 3
+    assert counts(db) == (1, 0)
+    assert purge_batch(db, cutoff) == 1
+    assert counts(db) == (0, 0)
+    assert purge_batch(db, cutoff) == 0
+
+
+def test_respects_retention_cutoff(db, user):
+    now = datetime.utcnow()
+    add_list(db, user, items=2, item_deleted_at=now - timedelta(days=2))
+    add_list(db, user, items=2, item_deleted_at=now - timedelta(minutes=5))
+    add_list(db, user, deleted_at=now - timedelta(minutes=5))
+    add_list(db, user, items=2)
+
+    assert purge_batch(db, now - timedelta(days=1)) == 2
+    assert purge_batch(db, now - timedelta(days=1)) == 0
+    assert counts(db) == (4, 4)
+
+
+def test_stops_at_batch_size(db, user):
+    old = datetime.utcnow() - timedelta(days=2)
+    add_list(db, user, items=5, item_deleted_at=old)
+    cutoff = datetime.utcnow() - timedelta(days=1)
+
+    assert purge_batch(db, cutoff, batch_size=2) == 2
+    assert counts(db) == (1, 3)
+    assert purge_batch(db, cutoff, batch_size=2) == 2
+    assert purge_batch(db, cutoff, batch_size=2) == 1
+    assert purge_batch(db, cutoff, batch_size=2) == 0
+    assert counts(db) == (1, 0)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from app.auth import REFRESH_TOKEN_REUSE_GRACE_SECONDS, hash_refresh_token
+from app.models import RefreshToken
+
+
+def refresh(client, token):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+def stored(db, token):
+    db.expire_all()
+    return db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    ).one()
+
+
+def test_refresh_rotates_token(client, login, db):
+    token = login()["refresh_token"]
+    response = refresh(client, token)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["access_token"] and body["refresh_token"] != token
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {body['access_token']}"})
+    assert me.json()["username"] == "alice"
+    assert stored(db, token).rotated_at is not None
+    assert refresh(client, body["refresh_token"]).status_code == 200
+
+
+def test_second_refresh_within_grace_gets_sibling(client, login):
+    token = login()["refresh_token"]
+    first = refresh(client, token)
+    second = refresh(client, token)
+    assert first.status_code == 200 and second.status_code == 200
+
+    siblings = {first.json()["refresh_token"], second.json()["refresh_token"]}
+    assert len(siblings) == 2
+    for sibling in siblings:
+        assert refresh(client, sibling).status_code == 200
+
+
+def test_reuse_after_grace_revokes_family(client, login, db):
+    token = login()["refresh_token"]
+    successor = refresh(client, token).json()["refresh_token"]
+    other_session = login()["refresh_token"]
+
+    row = stored(db, token)
+    row.rotated_at -= timedelta(seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS + 1)
+    db.commit()
+
+    assert refresh(client, token).status_code == 401
+    db.expire_all()
+    family = db.query(RefreshToken).filter(RefreshToken.family_id == row.family_id).all()
+    assert len(family) == 2
+    assert all(t.revoked_at is not None for t in family)
+    assert refresh(client, successor).status_code == 401
+
+    # Other logins of the same user are a different family
+    assert refresh(client, other_session).status_code == 200
+
+
+def test_expired_token_rejected(client, login, db):
+    token = login()["refresh_token"]
+    row = stored(db, token)
+    row.expires_at -= timedelta(days=365)
+    db.commit()
+    assert refresh(client, token).status_code == 401
+
+
+def test_unknown_token_rejected(client):
+    assert refresh(client, "not-a-token").status_code == 401
+
+
+def test_logout_revokes_family(client, login):
+    token = login()["refresh_token"]
+    current = refresh(client, token).json()["refresh_token"]
+
+    assert client.post("/auth/logout", json={"refresh_token": current}).status_code == 204
+    assert refresh(client, current).status_code == 401
+    assert refresh(client, token).status_code == 401
@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.fixture
+def headers(login):
+    return {"Authorization": f"Bearer {login()['access_token']}"}
+
+
+@pytest.fixture
+def todo_list(client, headers):
+    todo_list = client.post("/lists/", json={"name": "Home"}, headers=headers).json()
+    todo_list["items"] = [
+        client.post(f"/lists/{todo_list['id']}/items/", json={"title": title}, headers=headers).json()
+        for title in ("Milk", "Eggs", "Bread")
+    ]
+    return todo_list
+
+
+def test_deleted_item_disappears(client, headers, todo_list):
+    milk, eggs, bread = todo_list["items"]
+    assert client.delete(f"/items/{eggs['id']}", headers=headers).status_code == 204
+
+    lists = client.get("/lists/", headers=headers).json()
+    assert [i["id"] for i in lists[0]["items"]] == [milk["id"], bread["id"]]
+    one = client.get(f"/lists/{todo_list['id']}", headers=headers).json()
+    assert [i["id"] for i in one["items"]] == [milk["id"], bread["id"]]
+
+    assert client.patch(f"/items/{eggs['id']}", json={"completed": True}, headers=headers).status_code == 404
+    assert client.delete(f"/items/{eggs['id']}", headers=headers).status_code == 404
+    moved = client.post(f"/items/{eggs['id']}/move", json={"before_id": milk["id"]}, headers=headers)
+    assert moved.status_code == 404
+    # ...and can't be used as a neighbour either
+    neighbour = client.post(f"/items/{bread['id']}/move", json={"after_id": eggs["id"]}, headers=headers)
+    assert neighbour.status_code == 404
+
+
+def test_deleted_list_disappears(client, headers, todo_list):
+    milk = todo_list["items"][0]
+    assert client.delete(f"/lists/{todo_list['id']}", headers=headers).status_code == 204
+
+    assert client.get("/lists/", headers=headers).json() == []
+    assert client.get(f"/lists/{todo_list['id']}", headers=headers).status_code == 404
+    assert client.delete(f"/lists/{todo_list['id']}", headers=headers).status_code == 404
+
+    # Its items are gone too, although only the list row was touched
+    assert client.patch(f"/items/{milk['id']}", json={"title": "x"}, headers=headers).status_code == 404
+    assert client.post(f"/items/{milk['id']}/move", json={"after_id": todo_list["items"][1]["id"]}, headers=headers).status_code == 404
+    assert client.delete(f"/items/{milk['id']}", headers=headers).status_code == 404
+    created = client.post(f"/lists/{todo_list['id']}/items/", json={"title": "Tea"}, headers=headers)
+    assert created.status_code == 404
+
+
+def test_other_users_cannot_delete(client, login, headers, todo_list):
+    other = {"Authorization": f"Bearer {login('bob')['access_token']}"}
+    assert client.delete(f"/lists/{todo_list['id']}", headers=other).status_code == 404
+    assert client.delete(f"/items/{todo_list['items'][0]['id']}", headers=other).status_code == 404
+    assert len(client.get(f"/lists/{todo_list['id']}", headers=headers).json()["items"]) == 3